@@ -6,9 +6,11 @@ Multi-Agent System with Query Validation and Multi-DB Support
 import os
 import json
 import pandas as pd
+import matplotlib
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import TypedDict, Annotated, Literal
 from sqlalchemy import create_engine, text, inspect
 from fpdf import FPDF
@@ -440,8 +442,9 @@ class VisualizationAgent:
                 plt.ylabel(y_col.replace('_', ' ').title())
                 plt.tight_layout()
                 
-                filename = f"chart_{i}_{datetime.now().strftime('%H%M%S')}.png"
-                plt.savefig(filename, dpi=300, bbox_inches='tight')
+                filename = f"chart_{i}_{datetime.now().strftime('%H%M%S')}.jpg"
+                plt.savefig(filename, dpi=120, bbox_inches='tight', format='jpg',
+                            pil_kwargs={'quality': 80, 'optimize': True})
                 plt.close()
                 
                 chart_files.append(filename)
@@ -455,47 +458,80 @@ class VisualizationAgent:
         return state
 
 
+# DejaVu ships with matplotlib; embedding it lets reports render non-ASCII
+# database values that the core Arial/Courier fonts cannot encode
+_FONT_DIR = os.path.join(matplotlib.get_data_path(), 'fonts', 'ttf')
+_REPORT_FONTS = {
+    'DejaVu': {'': 'DejaVuSans.ttf', 'B': 'DejaVuSans-Bold.ttf', 'I': 'DejaVuSans-Oblique.ttf'},
+    'DejaVuMono': {'': 'DejaVuSansMono.ttf'}
+}
+
+
+class ReportPDF(FPDF):
+    """FPDF document with Unicode fonts registered once and shared text styles"""
+    
+    def __init__(self):
+        super().__init__()
+        try:
+            for family, styles in _REPORT_FONTS.items():
+                for style, filename in styles.items():
+                    self.add_font(family, style, os.path.join(_FONT_DIR, filename))
+            self.body_font, self.mono_font = 'DejaVu', 'DejaVuMono'
+        except OSError:
+            self.body_font, self.mono_font = 'Helvetica', 'Courier'
+    
+    def body(self, size: int = 11, style: str = ''):
+        """Switch to the body font (fpdf2 skips the switch if nothing changed)"""
+        self.set_font(self.body_font, style, size)
+    
+    def mono(self, size: int = 9):
+        """Switch to the monospace font used for SQL and logs"""
+        self.set_font(self.mono_font, '', size)
+    
+    def h2(self, text: str):
+        """Shaded section heading"""
+        self.body(14, 'B')
+        self.set_fill_color(230, 230, 230)
+        self.cell(0, 10, text, ln=True, fill=True)
+
+
 class PDFGenerationAgent:
     """Agent to generate comprehensive PDF reports"""
     
     def __call__(self, state: AgentState) -> AgentState:
         """Generate detailed PDF report"""
         
-        pdf = FPDF()
+        pdf = ReportPDF()
         pdf.add_page()
         
         # Header
-        pdf.set_font('Arial', 'B', 20)
+        pdf.body(20, 'B')
         pdf.set_text_color(0, 51, 102)
         pdf.cell(0, 15, 'SQL Query Analysis Report', ln=True, align='C')
         pdf.set_text_color(0, 0, 0)
         pdf.ln(5)
         
         # Metadata
-        pdf.set_font('Arial', 'I', 9)
+        pdf.body(9, 'I')
         pdf.cell(0, 5, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ln=True)
         pdf.cell(0, 5, f"Database: {state['db_type'].upper()}", ln=True)
         pdf.ln(5)
         
         # Question Section
-        pdf.set_font('Arial', 'B', 14)
-        pdf.set_fill_color(230, 230, 230)
-        pdf.cell(0, 10, 'User Question', ln=True, fill=True)
-        pdf.set_font('Arial', '', 11)
+        pdf.h2('User Question')
+        pdf.body(11)
         pdf.multi_cell(0, 8, state['user_question'])
         pdf.ln(3)
         
         # SQL Query Section
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Generated SQL Query', ln=True, fill=True)
-        pdf.set_font('Courier', '', 9)
+        pdf.h2('Generated SQL Query')
+        pdf.mono(9)
         pdf.multi_cell(0, 5, state['sql_query'])
         pdf.ln(3)
         
         # Validation Results
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Query Validation', ln=True, fill=True)
-        pdf.set_font('Arial', '', 10)
+        pdf.h2('Query Validation')
+        pdf.body(10)
         
         validation = state['validation_result']
         status = "✓ PASSED" if validation.get('safe_to_execute') else "✗ FAILED"
@@ -509,17 +545,15 @@ class PDFGenerationAgent:
         
         # Analysis Summary
         analysis = state['analysis']
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Analysis Summary', ln=True, fill=True)
-        pdf.set_font('Arial', '', 11)
+        pdf.h2('Analysis Summary')
+        pdf.body(11)
         pdf.multi_cell(0, 8, analysis.get('summary', 'No summary available'))
         pdf.ln(3)
         
         # Key Metrics
         if analysis.get('key_metrics'):
-            pdf.set_font('Arial', 'B', 14)
-            pdf.cell(0, 10, 'Key Metrics', ln=True, fill=True)
-            pdf.set_font('Arial', '', 11)
+            pdf.h2('Key Metrics')
+            pdf.body(11)
             
             for metric in analysis['key_metrics']:
                 unit = f" {metric['unit']}" if metric.get('unit') else ""
@@ -528,9 +562,8 @@ class PDFGenerationAgent:
         
         # Insights
         if analysis.get('insights'):
-            pdf.set_font('Arial', 'B', 14)
-            pdf.cell(0, 10, 'Key Insights', ln=True, fill=True)
-            pdf.set_font('Arial', '', 11)
+            pdf.h2('Key Insights')
+            pdf.body(11)
             
             for insight in analysis['insights']:
                 pdf.multi_cell(0, 7, f"  • {insight}")
@@ -540,59 +573,64 @@ class PDFGenerationAgent:
         if state['query_results'] is not None and len(state['query_results']) > 0:
             df = state['query_results']
             
-            pdf.set_font('Arial', 'B', 14)
-            pdf.cell(0, 10, 'Query Results', ln=True, fill=True)
-            pdf.set_font('Arial', '', 9)
+            pdf.h2('Query Results')
+            pdf.body(9)
             
             # Calculate column widths
             num_cols = len(df.columns)
             col_width = 190 / num_cols if num_cols <= 5 else 38
             
             # Headers
-            pdf.set_font('Arial', 'B', 9)
+            pdf.body(9, 'B')
             for col in df.columns:
                 pdf.cell(col_width, 7, str(col)[:15], 1, 0, 'C')
             pdf.ln()
             
             # Data rows (max 15 rows)
-            pdf.set_font('Arial', '', 8)
-            for idx, row in df.head(15).iterrows():
-                for col in df.columns:
-                    value = str(row[col])[:15]
-                    pdf.cell(col_width, 6, value, 1)
+            pdf.body(8)
+            rows = df.head(15).astype(str).to_numpy()
+            for row in rows:
+                for value in row:
+                    pdf.cell(col_width, 6, value[:15], 1)
                 pdf.ln()
             
             if len(df) > 15:
-                pdf.set_font('Arial', 'I', 9)
+                pdf.body(9, 'I')
                 pdf.cell(0, 6, f"... and {len(df) - 15} more rows", ln=True)
         
         # Visualizations
         if state['chart_files']:
             pdf.add_page()
-            pdf.set_font('Arial', 'B', 16)
+            pdf.body(16, 'B')
             pdf.cell(0, 10, 'Data Visualizations', ln=True)
             pdf.ln(5)
             
             for i, chart_file in enumerate(state['chart_files']):
-                if os.path.exists(chart_file):
-                    if i > 0 and i % 2 == 0:
-                        pdf.add_page()
-                    
-                    viz_info = analysis['visualizations'][i] if i < len(analysis.get('visualizations', [])) else {}
-                    
-                    if viz_info.get('description'):
-                        pdf.set_font('Arial', '', 10)
-                        pdf.multi_cell(0, 6, viz_info['description'])
-                        pdf.ln(2)
-                    
-                    pdf.image(chart_file, x=10, w=190)
-                    pdf.ln(10)
+                # Read each chart once; fpdf2 embeds the JPEG bytes without reopening the file
+                try:
+                    with open(chart_file, 'rb') as f:
+                        chart_bytes = f.read()
+                except FileNotFoundError:
+                    state['messages'].append(f"⚠ PDF: Chart file not found - {chart_file}")
+                    continue
+                
+                if i > 0 and i % 2 == 0:
+                    pdf.add_page()
+                
+                viz_info = analysis['visualizations'][i] if i < len(analysis.get('visualizations', [])) else {}
+                
+                if viz_info.get('description'):
+                    pdf.body(10)
+                    pdf.multi_cell(0, 6, viz_info['description'])
+                    pdf.ln(2)
+                
+                pdf.image(chart_bytes, x=10, w=190)
+                pdf.ln(10)
         
         # Process Log
         pdf.add_page()
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Process Log', ln=True, fill=True)
-        pdf.set_font('Courier', '', 8)
+        pdf.h2('Process Log')
+        pdf.mono(8)
         
         for msg in state['messages']:
             pdf.multi_cell(0, 5, msg)
@@ -606,8 +644,7 @@ class PDFGenerationAgent:
         
         # Cleanup charts
         for chart_file in state['chart_files']:
-            if os.path.exists(chart_file):
-                os.remove(chart_file)
+            Path(chart_file).unlink(missing_ok=True)
         
         return state
 
@@ -737,11 +774,13 @@ class NLToSQLSystem:
 # DEMO & TESTING
 # ============================================================================
 
-def create_demo_database():
+def create_demo_database(seed=None):
     """Create a demo SQLite database with sample data"""
     
     import sqlite3
-    import random
+    import numpy as np
+    
+    rng = np.random.default_rng(seed)
     
     db_file = 'demo_sales.db'
     conn = sqlite3.connect(db_file)
@@ -831,23 +870,24 @@ def create_demo_database():
     ]
     cursor.executemany('INSERT INTO users VALUES (?,?,?,CURRENT_TIMESTAMP)', users)
     
-    # Insert sales (last 2 months)
-    base_date = datetime.now() - timedelta(days=60)
-    sales_data = []
+    # Insert sales (last 2 months), drawn in one vectorized block
+    n_sales = 200
+    prices = dict(cursor.execute('SELECT product_id, price FROM products').fetchall())
     
-    for i in range(1, 201):
-        product_id = random.randint(1, 12)
-        user_id = random.randint(1, 5)
-        quantity = random.randint(1, 5)
-        days_ago = random.randint(0, 60)
-        sale_date = (base_date + timedelta(days=days_ago)).date()
-        
-        # Get product price
-        cursor.execute('SELECT price FROM products WHERE product_id = ?', (product_id,))
-        price = cursor.fetchone()[0]
-        total = price * quantity
-        
-        sales_data.append((i, product_id, user_id, quantity, sale_date, total))
+    product_ids = rng.integers(1, 13, n_sales)
+    user_ids = rng.integers(1, 6, n_sales)
+    quantities = rng.integers(1, 6, n_sales)
+    days_ago = rng.integers(0, 61, n_sales)
+    
+    base_date = np.datetime64((datetime.now() - timedelta(days=60)).date())
+    sale_dates = (base_date + days_ago).astype(str)
+    
+    sales_data = [
+        (i, product_id, user_id, quantity, sale_date, prices[product_id] * quantity)
+        for i, (product_id, user_id, quantity, sale_date) in enumerate(
+            zip(product_ids.tolist(), user_ids.tolist(), quantities.tolist(), sale_dates.tolist()), 1
+        )
+    ]
     
     cursor.executemany('INSERT INTO sales VALUES (?,?,?,?,?,?)', sales_data)
     
@@ -0,0 +1,32 @@
+# Test the local SQL pre-filter
+# Run: python test_prefilter.py
+
+from nl_to_sql_langgraph import _local_prefilter
+
+schema = {
+    'sales': {'columns': {'sale_id': 'INTEGER', 'product_id': 'INTEGER', 'quantity': 'INTEGER',
+                          'unit_price': 'REAL', 'sale_date': 'DATE', 'status': 'TEXT'}},
+    'products': {'columns': {'product_id': 'INTEGER', 'product_name': 'TEXT', 'category': 'TEXT'}},
+}
+
+# Filtered multi-condition SELECTs must pass locally (AND/OR are not function calls)
+cases = [
+    "SELECT SUM(s.quantity) AS total_sold FROM sales s JOIN products p ON s.product_id = p.product_id "
+    "WHERE p.product_name LIKE '%T-Shirt%' AND s.sale_date >= date('now', '-1 month')",
+    "SELECT COUNT(*) FROM sales WHERE status = 'completed' AND quantity > 1 OR unit_price BETWEEN 1 AND 5",
+    "SELECT p.category, SUM(s.quantity) FROM sales s JOIN products p "
+    "ON s.product_id = p.product_id AND s.quantity > 1 WHERE NOT s.status = 'refunded' GROUP BY p.category",
+]
+for sql in cases:
+    result = _local_prefilter(sql, 'sqlite', schema)
+    mark = "✅" if result['verdict'] == 'safe' and not result['issues'] else "❌"
+    print(f"{mark} {result['verdict']}: {sql[:60]}... {result['issues']}")
+
+print("\n" + "="*50 + "\n")
+
+# Only bare * and t.* projections get the column suggestion, not COUNT(*)
+for sql, expected in [("SELECT COUNT(*) FROM sales", False), ("SELECT s.* FROM sales s", True),
+                      ("SELECT * FROM products", True)]:
+    flagged = any('instead of *' in s for s in _local_prefilter(sql, 'sqlite', schema)['suggestions'])
+    mark = "✅" if flagged == expected else "❌"
+    print(f"{mark} star suggestion {flagged}: {sql}")
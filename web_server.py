@@ -4,11 +4,18 @@ Serves the frontend and provides API endpoints for query processing and file dow
 """
 
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import os
 import json
+import hashlib
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 import uvicorn
@@ -37,6 +44,70 @@ REPORTS_DIR = Path('.')
 TEMPLATES_DIR = Path('templates')
 API_KEY = os.getenv('ANTHROPIC_API_KEY')
 
+# The workflow is synchronous (LLM calls, DB queries, PDF rendering); it runs in
+# this small pool so the event loop keeps serving static files and health checks
+QUERY_WORKERS = 4
+EXECUTOR = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix='nl-sql')
+
+# NLToSQLSystems by database URL, built by the first request and reused. The URL
+# comes from the client, so this is a small LRU: each entry holds an engine and
+# its connection pool, and evicted systems have their engine disposed
+SYSTEM_CACHE_SIZE = 4
+_SYSTEM_CACHE = OrderedDict()
+_SYSTEM_CACHE_LOCK = threading.Lock()
+
+
+def _get_system(db_url: str):
+    """Shared NLToSQLSystem for db_url, built on first use
+    
+    Construction runs outside the lock so a slow or unreachable database
+    doesn't stall requests for other URLs; if two requests race, the first
+    system stored wins and the other is disposed.
+    """
+    with _SYSTEM_CACHE_LOCK:
+        nl_sql = _SYSTEM_CACHE.get(db_url)
+        if nl_sql is not None:
+            _SYSTEM_CACHE.move_to_end(db_url)
+            return nl_sql
+    
+    # Import here to avoid circular imports
+    from nl_to_sql_langgraph import NLToSQLSystem
+    
+    print(f"✓ Creating NLToSQLSystem with database: {db_url}")
+    # Probe so an unreachable database fails here with a clear error and is never cached
+    built = NLToSQLSystem(db_url=db_url, api_key=API_KEY, probe=True)
+    print(f"✓ NLToSQLSystem created successfully")
+    
+    discarded = []
+    with _SYSTEM_CACHE_LOCK:
+        nl_sql = _SYSTEM_CACHE.setdefault(db_url, built)
+        _SYSTEM_CACHE.move_to_end(db_url)
+        if nl_sql is not built:
+            discarded.append(built)
+        while len(_SYSTEM_CACHE) > SYSTEM_CACHE_SIZE:
+            discarded.append(_SYSTEM_CACHE.popitem(last=False)[1])
+    for system in discarded:
+        system.db_manager.dispose()
+    return nl_sql
+
+
+def _process_question(db_url: str, question: str) -> str:
+    """Run one question end to end on the shared system; returns the PDF path"""
+    # Reuse the system (DB manager, agents, compiled graph) for this database
+    nl_sql = _get_system(db_url)
+    
+    print(f"✓ Processing question...")
+    return nl_sql.process_question(question)
+
+
+# Last /api/reports listing, valid while the reports directory's mtime is unchanged
+_REPORTS_CACHE = {'mtime': None, 'data': None}
+
+# A report modified this recently may still be being written (its size can change
+# without touching the directory mtime), so such listings aren't cached
+REPORTS_SETTLE_NS = 2_000_000_000
+
+
 # Request Models
 class QueryRequest(BaseModel):
     question: str
@@ -48,39 +119,68 @@ class QueryResponse(BaseModel):
     error: Optional[str] = None
 
 
+# Static assets are read once and served from memory with a content ETag
+@lru_cache(maxsize=None)
+def _load_static(path: Path) -> tuple:
+    """(bytes, etag) for a static file, read on first use"""
+    content = path.read_bytes()
+    return content, f'"{hashlib.sha1(content).hexdigest()}"'
+
+
+def _static_response(request: Request, path: Path, media_type: str) -> Response:
+    """In-memory response for a static file; 304 when the browser's copy is current"""
+    content, etag = _load_static(path)
+    headers = {'ETag': etag}
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+@lru_cache(maxsize=None)
+def _background_image_path() -> Path:
+    """Prefer templates folder since it's the root for NGINX/static files"""
+    image_path = TEMPLATES_DIR / "homepage.jpg"
+    if image_path.exists():
+        return image_path
+    
+    # Fallback to image folder if needed
+    fallback_path = Path("image/homepage.jpg")
+    if fallback_path.exists():
+        return fallback_path
+    
+    return image_path
+
+
+# Read the frontend files into memory at startup, before the first request
+for _asset in (TEMPLATES_DIR / "index.html", TEMPLATES_DIR / "style.css",
+               TEMPLATES_DIR / "script.js", _background_image_path()):
+    if _asset.exists():
+        _load_static(_asset)
+
+
 # Routes
 @app.get("/")
-async def index():
+async def index(request: Request):
     """Serve the frontend HTML"""
-    return FileResponse(TEMPLATES_DIR / "index.html")
+    return _static_response(request, TEMPLATES_DIR / "index.html", 'text/html')
 
 
 @app.get("/style.css")
-async def get_css():
+async def get_css(request: Request):
     """Serve CSS file"""
-    return FileResponse(TEMPLATES_DIR / "style.css")
+    return _static_response(request, TEMPLATES_DIR / "style.css", 'text/css')
 
 
 @app.get("/script.js")
-async def get_js():
+async def get_js(request: Request):
     """Serve JavaScript file"""
-    return FileResponse(TEMPLATES_DIR / "script.js")
+    return _static_response(request, TEMPLATES_DIR / "script.js", 'text/javascript')
 
 
 @app.get("/homepage.jpg")
-async def get_background_image():
+async def get_background_image(request: Request):
     """Serve background image"""
-    # Prefer templates folder since it's the root for NGINX/static files
-    image_path = TEMPLATES_DIR / "homepage.jpg"
-    if image_path.exists():
-        return FileResponse(image_path)
-    
-    # Fallback to image folder if needed
-    fallback_path = Path("image/homepage.jpg")
-    if fallback_path.exists():
-        return FileResponse(fallback_path)
-    
-    return FileResponse(image_path)
+    return _static_response(request, _background_image_path(), 'image/jpeg')
 
 
 @app.post("/api/analyze", response_model=QueryResponse)
@@ -129,23 +229,12 @@ async def analyze_query(request: QueryRequest):
                 error="ANTHROPIC_API_KEY not configured. Please set it in environment variables."
             )
         
-        # Import here to avoid circular imports
-        from nl_to_sql_langgraph import NLToSQLSystem
-        
-        print(f"✓ Creating NLToSQLSystem with database: {request.database}")
-        
-        # Create system instance
-        nl_sql = NLToSQLSystem(
-            db_url=request.database,
-            api_key=API_KEY
+        # Process the query off the event loop (first use also builds the system)
+        loop = asyncio.get_running_loop()
+        pdf_file = await loop.run_in_executor(
+            EXECUTOR, _process_question, request.database, request.question
         )
         
-        print(f"✓ NLToSQLSystem created successfully")
-        print(f"✓ Processing question...")
-        
-        # Process the query
-        pdf_file = nl_sql.process_question(request.question)
-        
         print(f"✓ Query processed successfully")
         print(f"✓ PDF file: {pdf_file}\n")
         
@@ -190,16 +279,19 @@ async def download_report(filename: str):
         if '..' in filename or '/' in filename or '\\' in filename:
             raise HTTPException(status_code=400, detail="Invalid filename")
         
-        # Check if file exists
+        # Check if file exists; the stat is handed to FileResponse so it isn't repeated
         file_path = REPORTS_DIR / filename
         
-        if not file_path.exists():
+        try:
+            stat_result = file_path.stat()
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="File not found")
         
         return FileResponse(
             file_path,
             media_type='application/pdf',
-            filename=filename
+            filename=filename,
+            stat_result=stat_result
         )
     
     except HTTPException:
@@ -217,22 +309,36 @@ async def list_reports():
         JSON list of report filenames with metadata
     """
     try:
+        # Adding or removing a report changes the directory mtime
+        mtime = REPORTS_DIR.stat().st_mtime_ns
+        if _REPORTS_CACHE['mtime'] == mtime:
+            return _REPORTS_CACHE['data']
+        
         reports = []
+        newest_ns = 0
         
-        for pdf_file in REPORTS_DIR.glob('report_*.pdf'):
-            reports.append({
-                'filename': pdf_file.name,
-                'size': pdf_file.stat().st_size,
-                'created': pdf_file.stat().st_mtime
-            })
+        # scandir entries carry their stat, so each file is stat'ed at most once
+        with os.scandir(REPORTS_DIR) as entries:
+            for entry in entries:
+                if entry.name.startswith('report_') and entry.name.endswith('.pdf') and entry.is_file():
+                    st = entry.stat()
+                    newest_ns = max(newest_ns, st.st_mtime_ns)
+                    reports.append({
+                        'filename': entry.name,
+                        'size': st.st_size,
+                        'created': st.st_mtime
+                    })
         
         # Sort by creation time (newest first)
         reports.sort(key=lambda x: x['created'], reverse=True)
         
-        return {
+        data = {
             'success': True,
             'reports': reports
         }
+        if time.time_ns() - newest_ns > REPORTS_SETTLE_NS:
+            _REPORTS_CACHE.update(mtime=mtime, data=data)
+        return data
     
     except Exception as e:
         return {